@@ -1,44 +1,271 @@
-from abc import abstractmethod
-from typing import List, Generic, TypeVar
-from monad import Option, Mapper
+import logging
+import multiprocessing as mp
+from functools import reduce
+from typing import Callable, Iterable, Iterator, List, Generic, Optional, Sequence, Tuple, Type, TypeVar
+import numpy as np
+from monad import Option, OptionBatch, Mapper
 
 T = TypeVar("T")
 
+log = logging.getLogger(__name__)
+
 
 class Pipe(Generic[T], Mapper):
     """
     Type Consistency Pipe
     """
 
+    __slots__ = ()
+
+    _str = "Pipe"
+    _repr = "Pipe<Pipe>"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # cached per class, pipes are formatted in the filtered data log of `Sequencer`.
+        cls._str = cls.__name__
+        cls._repr = f"Pipe<{cls.__name__}>"
+
     def __str__(self):
-        return self.__class__.__name__
+        return self._str
 
     def __repr__(self):
-        return f"Pipe<{self.__class__.__name__}>"
+        return self._repr
 
     def __call__(self, data: Option[T]) -> Option[T]:
-        if data.is_none():
+        if not data:
             # data has been filtered out.
             return data
         return self.map(data)
 
-    @abstractmethod
     def map(self, data: Option[T]) -> Option[T]:
-        raise NotImplemented
+        raise NotImplementedError
+
+    def map_batch(self, batch: OptionBatch) -> OptionBatch:
+        """
+        Map a batch of options, calling `map` once per sample.
+        Override it with a vectorized body for numeric pipes.
+        """
+        if len(batch) == 0:
+            return OptionBatch(np.empty(0, dtype=batch.values.dtype), np.empty(0, dtype=bool))
+        values = batch.values.tolist()
+        results = [self(o) for o in batch.to_options()]
+        return OptionBatch(
+            np.array([r.unwrap_or(v) for r, v in zip(results, values)]),
+            np.array([r.is_some() for r in results], dtype=bool),
+        )
+
+
+def _result_dtype(kernel: Callable, dtype: np.dtype) -> np.dtype:
+    """
+    The dtype a numba-compiled scalar kernel returns for values of `dtype`.
+    """
+    from numba.np.numpy_support import as_dtype, from_dtype
+
+    sig = (from_dtype(dtype),)
+    kernel.compile(sig)
+    return as_dtype(kernel.overloads[sig].signature.return_type)
+
+
+def numba_pipe(fn: Callable[[T], T]) -> Type[Pipe[T]]:
+    """
+    Build a pipe class from a scalar numeric function compiled with numba.
+    `map_batch` runs it over the `Some` values in a parallel loop, its values take the
+    kernel's result dtype as they do with `map`.
+    The loop is compiled on the first `map_batch`, which also starts numba's thread pool.
+    """
+    import numba
+    from numba import prange
+
+    kernel = numba.njit(cache=True)(fn)
+
+    @numba.njit(parallel=True)
+    def apply(values, mask, out):
+        for i in prange(len(values)):
+            if mask[i]:
+                out[i] = kernel(values[i])
+
+    class NumbaPipe(Pipe[T]):
+        __slots__ = ()
+
+        def map(self, data: Option[T]) -> Option[T]:
+            return data.map(kernel)
+
+        def map_batch(self, batch: OptionBatch) -> OptionBatch:
+            out = np.empty(len(batch), dtype=_result_dtype(kernel, batch.values.dtype))
+            apply(batch.values, batch.mask, out)
+            return OptionBatch(out, batch.mask)
+
+    # lets a `Sequencer` of numba pipes compile the whole chain at once.
+    NumbaPipe.kernel = staticmethod(kernel)
+    # let pickle find the class under the decorated name.
+    NumbaPipe.__name__ = fn.__name__
+    NumbaPipe.__qualname__ = fn.__qualname__
+    NumbaPipe._str = fn.__name__
+    NumbaPipe._repr = f"Pipe<{fn.__name__}>"
+    NumbaPipe.__module__ = fn.__module__
+    return NumbaPipe
+
+
+def _fuse(pipes: Sequence[Pipe[T]]) -> Callable[[Option[T]], Option[T]]:
+    """
+    Compile the `map` calls of pipes into a single function, stopping at the first `None`.
+    """
+    namespace = {"log": log}
+    lines = ["def fused(data):"]
+    for i, pipe in enumerate(pipes):
+        namespace[f"pipe{i}"] = pipe
+        namespace[f"map{i}"] = pipe.map
+        lines += [
+            f"    data = map{i}(data)",
+            "    if not data:",
+            f'        log.debug("Data is filtered out by %s.", pipe{i})',
+            "        return data",
+        ]
+    lines.append("    return data")
+    exec(compile("\n".join(lines), "<sequencer>", "exec"), namespace)
+    return namespace["fused"]
+
+
+def _compose(f: Callable, g: Callable) -> Callable:
+    return lambda x: g(f(x))
+
+
+def _vectorize(pipes: Sequence[Pipe[T]]) -> Optional[Callable]:
+    """
+    Compile pipes which all expose a scalar `kernel` (see `numba_pipe`) into one parallel numba ufunc.
+    Returns `None` if a pipe has no kernel or the chain does not compile for int64 and float64.
+    """
+    if not pipes or not all(hasattr(pipe, "kernel") for pipe in pipes):
+        return None
+    import numba
+    from numba.core.errors import NumbaError
+
+    fused = reduce(
+        lambda f, g: numba.njit(_compose(f, g)), [pipe.kernel for pipe in pipes]
+    )
+    try:
+        return numba.vectorize(
+            ["float64(float64)", "int64(int64)"], target="parallel"
+        )(fused)
+    except NumbaError:
+        return None
+
+
+def _keeps_dtype(pipes: Sequence[Pipe[T]], dtype: np.dtype) -> bool:
+    """
+    Whether every pipe has a `kernel` which maps values of `dtype` to `dtype`.
+    Only then does the fused ufunc match running the pipes one after another.
+    """
+    return all(
+        hasattr(pipe, "kernel") and _result_dtype(pipe.kernel, dtype) == dtype
+        for pipe in pipes
+    )
+
+
+# `Sequencer._ufunc` before its first `map_batch`, `_vectorize` may return `None`.
+_UNCOMPILED = object()
+# the batch dtypes `_vectorize` compiles loops for, others would be cast through them.
+_UFUNC_DTYPES = (np.dtype(np.int64), np.dtype(np.float64))
 
 
 class Sequencer(Pipe[T]):
+    """
+    Chain pipes, stopping at the first one that filters the data out.
+    Filtered data is reported on this module's logger at DEBUG level.
+    """
+
+    __slots__ = ("pipes", "_fused", "_ufunc")
+
     def __init__(self, pipes: List[Pipe[T]]):
-        self.pipes = pipes
+        # frozen, the fused function is bound to these pipes.
+        self.pipes = tuple(pipes)
+        self._fused = _fuse(self.pipes)
+        # compiled on the first `map_batch`, `Pipeline` never needs it.
+        self._ufunc = _UNCOMPILED
+
+    def __reduce__(self):
+        # the fused function and the ufunc are not picklable, rebuild them on the other side.
+        return self.__class__, (self.pipes,)
 
     def map(self, data: Option[T]) -> Option[T]:
+        return self._fused(data)
+
+    def map_batch(self, batch: OptionBatch) -> OptionBatch:
+        ufunc = None
+        dtype = batch.values.dtype
+        if dtype in _UFUNC_DTYPES and _keeps_dtype(self.pipes, dtype):
+            ufunc = self._ufunc
+            if ufunc is _UNCOMPILED:
+                ufunc = self._ufunc = _vectorize(self.pipes)
+        if ufunc is not None:
+            values = batch.values.copy()
+            values[batch.mask] = ufunc(batch.values[batch.mask])
+            return OptionBatch(values, batch.mask)
         for pipe in self.pipes:
-            data = pipe.map(data)
-            if data.is_none():
-                print(f"Data is filtered out by {pipe}.")
-                break
-        return data
+            out = pipe.map_batch(batch)
+            batch = OptionBatch(out.values, out.mask & batch.mask)
+        return batch
+
+
+def _chunksize(n: int, nproc: int) -> int:
+    """
+    Number of samples sent to a worker per round-trip, about 16 chunks per worker.
+    """
+    return max(1, n // (nproc * 16))
+
+
+# the sequencer of a `Pipeline` worker, shipped once per process by `_init_worker`.
+_worker_pipe: Optional["Sequencer"] = None
+
+
+def _init_worker(pipe: "Sequencer") -> None:
+    global _worker_pipe
+    _worker_pipe = pipe
+
+
+def _apply_indexed(item: Tuple[int, Option[T]]) -> Tuple[int, Option[T]]:
+    i, data = item
+    # samples all start as `Some`, so skip the filtered check of `Pipe.__call__`.
+    return i, _worker_pipe.map(data)
 
 
 class Pipeline:
-    pass
+    """
+    Run pipes over a list of samples, dropping the filtered ones.
+
+    Samples are spread over a `multiprocessing.Pool` of `num_proc` workers
+    (all CPUs if unset), so pipes must be picklable, i.e. defined at module top level.
+    """
+
+    def __init__(self, pipes: List[Pipe[T]], num_proc: Optional[int] = None):
+        self.pipe = Sequencer(pipes)
+        self.num_proc = num_proc
+
+    def run(self, data: List[T]) -> List[T]:
+        ncpus = self.num_proc or mp.cpu_count()
+        if ncpus <= 1 or len(data) <= 1:
+            return list(self.stream(data))
+        results = [None] * len(data)
+        chunksize = _chunksize(len(data), ncpus)
+        pool = mp.Pool(ncpus, initializer=_init_worker, initargs=(self.pipe,))
+        try:
+            # collect chunks as they finish, indices restore the input order.
+            for i, res in pool.imap_unordered(
+                _apply_indexed, enumerate(map(Option.some, data)), chunksize=chunksize
+            ):
+                results[i] = res
+        finally:
+            pool.close()
+            pool.join()
+        return [r.unwrap() for r in results if r]
+
+    def stream(self, data: Iterable[T]) -> Iterator[T]:
+        """
+        Lazily run the pipes over samples in the calling process, yielding the ones not filtered out.
+        """
+        apply = self.pipe.map
+        for x in data:
+            res = apply(Option.some(x))
+            if res:
+                yield res.unwrap()
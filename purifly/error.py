@@ -1,9 +1,18 @@
+from typing import Any
+
+
 class UnwrapException(Exception):
-    msg: str
+    fmt: str
+
+    def __init__(self, fmt: str, *args: Any):
+        # `fmt % args` is only formatted when the message is read.
+        super().__init__(fmt, *args)
+        self.fmt = fmt
 
-    def __init__(self, msg: str):
-        super().__init__(self)
-        self.msg = msg
+    @property
+    def msg(self) -> str:
+        args = self.args[1:]
+        return self.fmt % args if args else self.fmt
 
     def __str__(self):
         return f'OptionError: {self.msg}'
@@ -1,21 +1,45 @@
-from abc import ABC, abstractmethod
-from typing import Any, Callable, Iterator, List, Optional, TypeVar, Generic
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Iterator, List, Optional, TypeVar, Generic
+import numpy as np
 from error import UnwrapException
 
 T = TypeVar("T")
 U = TypeVar("U")
 
 
-class Option(Generic[T], ABC):
-    """`Option` monad for python."""
+if TYPE_CHECKING:
+    class _GenericBase(Generic[T]): ...
+else:
+    class _GenericBase:
+        """Keeps `Option[T]` subscriptable at runtime without the `typing.Generic` machinery."""
+
+        __slots__ = ()
+
+        def __class_getitem__(cls, item):
+            return cls
+
+
+class Option(_GenericBase[T]):
+    """`Option` monad for python.
+
+    Both variants share this class: `_s` tells `Some` from `None` and `_v` holds the value.
+    Use `Option.some`/`Option.none` rather than the constructor.
+    """
+
+    __slots__ = ("_v", "_s")
+
+    def __init__(self, value: T, is_some: bool) -> None:
+        self._v = value
+        self._s = is_some
 
     @staticmethod
     def from_nullable(value: Optional[T]) -> "Option[T]":
         """Construct an `Option` from a nullable value."""
         if value is None:
-            return OpNone()
+            return _NONE
         else:
-            return OpSome(value)
+            return Option(value, True)
 
     @staticmethod
     def some(value: T) -> "Option[T]":
@@ -27,7 +51,7 @@ class Option(Generic[T], ABC):
         Returns:
             `Option<Some(T)>`
         """
-        return OpSome(value)
+        return Option(value, True)
 
     @staticmethod
     def none() -> "Option[T]":
@@ -36,28 +60,34 @@ class Option(Generic[T], ABC):
         Returns:
             `Option<None>`
         """
-        return OpNone()
+        return _NONE
 
-    @abstractmethod
     def __bool__(self) -> bool:
         """Returns `False` only if contained value is `None`."""
-        ...
+        return self._s
 
-    @abstractmethod
-    def __str__(self) -> str: ...
+    def __str__(self) -> str:
+        return str(self._v) if self._s else "None"
 
-    @abstractmethod
-    def __repr__(self) -> str: ...
+    def __repr__(self) -> str:
+        return f"Option<{self._v}>" if self._s else "Option<None>"
 
-    @abstractmethod
-    def __eq__(self, other) -> bool: ...
+    def __eq__(self, other) -> bool:
+        if other is self:
+            return True
+        if isinstance(other, Option):
+            return self._s == other._s and (not self._s or self._v == other._v)
+        else:
+            return False
 
-    @abstractmethod
     def __hash__(self) -> int:
         """`hash(Option)` has the same result as its contained value."""
-        ...
+        return hash(self._v)
+
+    def __reduce__(self):
+        # keep `None` a singleton across pickling, e.g. for results of `Pipeline` workers.
+        return (Option.some, (self._v,)) if self._s else (Option.none, ())
 
-    @abstractmethod
     def is_some(self) -> bool:
         """Returns `True` if the option is a `Some` value.
 
@@ -72,9 +102,8 @@ class Option(Generic[T], ABC):
             assert not x.is_some()
             ```
         """
-        ...
+        return self._s
 
-    @abstractmethod
     def is_none(self) -> bool:
         """Returns `True` if the option is a `None` value.
 
@@ -89,9 +118,8 @@ class Option(Generic[T], ABC):
             assert x.is_none()
             ```
         """
-        ...
+        return not self._s
 
-    @abstractmethod
     def is_some_and(self, func: Callable[[T], bool]) -> bool:
         """Returns true if the option is a `Some` and the value inside it matches a predicate.
 
@@ -111,9 +139,8 @@ class Option(Generic[T], ABC):
             assert not x.is_some_and(lambda v: v > 1)
             ```
         """
-        ...
+        return func(self._v) if self._s else False
 
-    @abstractmethod
     def expect(self, msg: str) -> T:
         """Returns the contained `Some` value.
 
@@ -149,12 +176,13 @@ class Option(Generic[T], ABC):
             try:
                 x.expect('hey, this is an `Option<None>` object')
             except UnwrapException as e:
-                assert str(e) == 'hey, this is an `Option<None>` object'
+                assert str(e) == 'OptionError: hey, this is an `Option<None>` object'
             ```
         """
-        ...
+        if self._s:
+            return self._v
+        raise UnwrapException(msg)
 
-    @abstractmethod
     def to_array(self) -> List[T]:
         """Returns an array of the possible contained value.
 
@@ -164,9 +192,8 @@ class Option(Generic[T], ABC):
             assert Option.none().to_array() == []
             ```
         """
-        ...
+        return [self._v] if self._s else []
 
-    @abstractmethod
     def unwrap(self) -> T:
         """Returns the contained `Some` value.
 
@@ -187,9 +214,10 @@ class Option(Generic[T], ABC):
                 assert str(e) == 'OptionError: call `Option.unwrap` on an `Option<None>` object'
             ```
         """
-        ...
+        if self._s:
+            return self._v
+        raise UnwrapException("call `Option.unwrap` on an `Option<None>` object")
 
-    @abstractmethod
     def unwrap_or(self, default: T) -> T:
         """Returns the contained `Some` value or a provided defaul
 
@@ -209,9 +237,8 @@ class Option(Generic[T], ABC):
             assert Option.none().unwrap_or("bike") == "bike"
             ```
         """
-        ...
+        return self._v if self._s else default
 
-    @abstractmethod
     def unwrap_or_else(self, func: Callable[[], T]) -> T:
         """Returns the contained `Some` value or computes it from a callable objec
 
@@ -225,9 +252,8 @@ class Option(Generic[T], ABC):
             assert Option.none().unwrap_or_else(lambda: 2 * k) == 20
             ```
         """
-        ...
+        return self._v if self._s else func()
 
-    @abstractmethod
     def inspect(self, func: Callable[[T], None]) -> "Option[T]":
         """Calls the provided closure with the contained value (if `Some`), and return the option itself.
 
@@ -243,9 +269,10 @@ class Option(Generic[T], ABC):
             assert x == [2]
             ```
         """
-        ...
+        if self._s:
+            func(self._v)
+        return self
 
-    @abstractmethod
     def map(self, func: Callable[[T], U]) -> "Option[U]":
         """Maps an `Option<T>` to `Option<U>` by applying a function
         to a contained value (if `Some`) or returns `None` (if `None`).
@@ -265,9 +292,8 @@ class Option(Generic[T], ABC):
             assert Option.none().map(lambda s: len(s)) == Option.none()
             ```
         """
-        ...
+        return Option(func(self._v), True) if self._s else _NONE
 
-    @abstractmethod
     def map_or(self, default: U, func: Callable[[T], U]) -> U:
         """Returns the provided default result (if none), or applies a function to the contained value (if any).
 
@@ -284,9 +310,8 @@ class Option(Generic[T], ABC):
             assert Option.none().map_or(42, lambda s: len(s)) == 42
             ```
         """
-        ...
+        return func(self._v) if self._s else default
 
-    @abstractmethod
     def map_or_else(self, default: Callable[[], U], func: Callable[[T], U]) -> U:
         """Computes a default function result (if none),
         or applies a different function to the contained value (if any).
@@ -302,9 +327,8 @@ class Option(Generic[T], ABC):
             assert Option.none().map_or_else(lambda: 2 * k, lambda s: len(s)) == 42
             ```
         """
-        ...
+        return func(self._v) if self._s else default()
 
-    @abstractmethod
     def filter(self, func: Callable[[T], bool]) -> "Option[T]":
         """Filter the option.
 
@@ -327,9 +351,8 @@ class Option(Generic[T], ABC):
             assert Option.some(4).filter(lambda n: n % 2 == 0) == Option.some(4)
             ```
         """
-        ...
+        return self if self._s and func(self._v) else _NONE
 
-    @abstractmethod
     def and_then(self, func: Callable[[T], "Option[U]"]) -> "Option[U]":
         """Returns `None` if the option is `None`,
         otherwise calls `func` with the wrapped value and returns the result
@@ -356,9 +379,8 @@ class Option(Generic[T], ABC):
             assert get_from(arr_2d, 2).and_then(lambda row: get_from(row, 0)) == Option.none()
             ```
         """
-        ...
+        return func(self._v) if self._s else _NONE
 
-    @abstractmethod
     def or_else(self, func: Callable[[], "Option[T]"]) -> "Option[T]":
         """Returns the option if it contains a value, otherwise calls `func` and returns the result
 
@@ -372,7 +394,7 @@ class Option(Generic[T], ABC):
             assert Option.none().or_else(lambda: Option.none()) == Option.none()
             ```
         """
-        ...
+        return self if self._s else func()
 
     def __add__(self, other: "Option[Any]") -> "Option[Any]":
         """Alias `self.__value.__add__`.
@@ -404,19 +426,19 @@ class Option(Generic[T], ABC):
 
     def __and__(self, other: "Option[Any]"):
         if isinstance(other, Option):
-            raise NotImplemented
+            raise NotImplementedError
         else:
             raise TypeError("expect another Option")
 
     def __or__(self, other: "Option[Any]"):
         if isinstance(other, Option):
-            raise NotImplemented
+            raise NotImplementedError
         else:
             raise TypeError("expect another Option")
 
     def __xor__(self, other: "Option[Any]"):
         if isinstance(other, Option):
-            raise NotImplemented
+            raise NotImplementedError
         else:
             raise TypeError("expect another Option")
 
@@ -428,148 +450,92 @@ class Option(Generic[T], ABC):
         return iter(self.to_array())
 
 
-class OpSome(Generic[T], Option[T]):
-    __value: T
-
-    def __init__(self, value: T) -> None:
-        self.__value = value
-
-    def __bool__(self) -> bool:
-        return True
-
-    def __str__(self):
-        return str(self.__value)
-
-    def __repr__(self):
-        return f"Option<{self.__value}>"
-
-    def __eq__(self, other):
-        if isinstance(other, OpSome):
-            return self.__value == other.__value
-        else:
-            return False
-
-    def __hash__(self):
-        return hash(self.__value)
-
-    def is_some(self) -> bool:
-        return True
-
-    def is_none(self) -> bool:
-        return False
-
-    def is_some_and(self, func: Callable[[T], bool]) -> bool:
-        return func(self.__value)
-
-    def expect(self, msg: str) -> T:
-        return self.__value
-
-    def to_array(self) -> List[T]:
-        return [self.__value]
-
-    def unwrap(self) -> T:
-        return self.__value
+_NONE: Option[Any] = Option(None, False)
 
-    def unwrap_or(self, default: T) -> T:
-        return self.__value
 
-    def unwrap_or_else(self, func: Callable[[], T]) -> T:
-        return self.__value
+class OptionBatch:
+    """A batch of `Option`s stored as an array of values and a boolean `mask` of the `Some` ones.
 
-    def inspect(self, func: Callable[[T], None]) -> Option[T]:
-        func(self.__value)
-        return self
+    Values where the mask is `False` are unspecified.
+    """
 
-    def map(self, func: Callable[[T], U]) -> Option[U]:
-        return Option.some(func(self.__value))
+    __slots__ = ("values", "mask")
 
-    def map_or(self, default: U, func: Callable[[T], U]) -> U:
-        return func(self.__value)
-
-    def map_or_else(self, default: Callable[[], U], func: Callable[[T], U]) -> U:
-        return func(self.__value)
+    values: np.ndarray
+    mask: np.ndarray
 
-    def filter(self, func: Callable[[T], bool]) -> Option[T]:
-        if func(self.__value):
-            return self.clone()
+    def __init__(self, values: np.ndarray, mask: Optional[np.ndarray] = None) -> None:
+        self.values = np.asarray(values)
+        if mask is None:
+            self.mask = np.ones(len(self.values), dtype=bool)
         else:
-            return OpNone()
-
-    def and_then(self, func: Callable[[T], Option[U]]) -> Option[U]:
-        return func(self.__value)
+            self.mask = np.asarray(mask, dtype=bool)
 
-    def or_else(self, func: Callable[[], Option[T]]) -> Option[T]:
-        return self.clone()
-
-
-class OpNone(Generic[T], Option[T]):
-    def __bool__(self):
-        return False
-
-    def __str__(self):
-        return "None"
+    @staticmethod
+    def from_options(options: List[Option[T]], fill: Any = 0) -> "OptionBatch":
+        """Construct a batch from options, storing `fill` in place of the `None` values."""
+        values = np.array([o.unwrap_or(fill) for o in options])
+        mask = np.array([o.is_some() for o in options], dtype=bool)
+        return OptionBatch(values, mask)
+
+    def to_options(self) -> List[Option[Any]]:
+        """Returns the options of the batch."""
+        return [
+            Option(v, True) if m else _NONE
+            for v, m in zip(self.values.tolist(), self.mask.tolist())
+        ]
+
+    def __len__(self) -> int:
+        return len(self.values)
 
     def __repr__(self):
-        return "Option<None>"
-
-    def __eq__(self, other):
-        return isinstance(other, OpNone)
-
-    def __hash__(self):
-        return hash(None)
-
-    def is_some(self) -> bool:
-        return False
+        return f"OptionBatch<{self.to_options()}>"
 
-    def is_none(self) -> bool:
-        return True
-
-    def is_some_and(self, func: Callable[[T], bool]) -> bool:
-        return False
-
-    def expect(self, msg: str) -> T:
-        raise UnwrapException(msg)
-
-    def to_array(self) -> List[T]:
-        return []
+    def __add__(self, other: "OptionBatch") -> "OptionBatch":
+        """Alias `add_batch(self, other)`."""
+        if isinstance(other, OptionBatch):
+            return add_batch(self, other)
+        else:
+            raise TypeError("expect another OptionBatch")
 
-    def unwrap(self) -> T:
-        raise UnwrapException(
-            "Option", "call `Option.unwrap` on an `Option<None>` object"
-        )
+    def __mul__(self, other: "OptionBatch") -> "OptionBatch":
+        """Alias `mul_batch(self, other)`."""
+        if isinstance(other, OptionBatch):
+            return mul_batch(self, other)
+        else:
+            raise TypeError("expect another OptionBatch")
 
-    def unwrap_or(self, default: T) -> T:
-        return default
 
-    def unwrap_or_else(self, func: Callable[[], T]) -> T:
-        return func()
+def _binary_batch(ufunc: np.ufunc, a: OptionBatch, b: OptionBatch) -> OptionBatch:
+    mask = a.mask & b.mask
+    out = np.empty(len(a), dtype=np.result_type(a.values, b.values))
+    ufunc(a.values, b.values, where=mask, out=out)
+    return OptionBatch(out, mask)
 
-    def inspect(self, func: Callable[[T], None]) -> Option[T]:
-        return self
 
-    def map(self, func: Callable[[T], U]) -> Option[U]:
-        return Option.none()
+def add_batch(a: OptionBatch, b: OptionBatch) -> OptionBatch:
+    """Element-wise `Option.__add__` over two batches in one NumPy call.
 
-    def map_or(self, default: U, func: Callable[[T], U]) -> U:
-        return default
+    Returns:
+        A batch which is `Some(a + b)` where both are `Some`, and `None` otherwise.
+    """
+    return _binary_batch(np.add, a, b)
 
-    def map_or_else(self, default: Callable[[], U], func: Callable[[T], U]) -> U:
-        return default()
 
-    def filter(self, func: Callable[[T], bool]) -> Option[T]:
-        return self
+def mul_batch(a: OptionBatch, b: OptionBatch) -> OptionBatch:
+    """Element-wise `Option.__mul__` over two batches in one NumPy call.
 
-    def and_then(self, func: Callable[[T], Option[U]]) -> Option[U]:
-        return Option.none()
+    Returns:
+        A batch which is `Some(a * b)` where both are `Some`, and `None` otherwise.
+    """
+    return _binary_batch(np.multiply, a, b)
 
-    def or_else(self, func: Callable[[], Option[T]]) -> Option[T]:
-        return func()
 
+class Mapper:
+    __slots__ = ()
 
-class Mapper(ABC):
     def __call__(self, data: Option) -> Option:
         return self.map(data)
 
-    @abstractmethod
     def map(self, data: Option) -> Option:
-        raise NotImplemented
+        raise NotImplementedError
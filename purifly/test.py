@@ -1,11 +1,47 @@
-from core import Pipe, Sequencer
-from monad import Option
+import numpy as np
+from core import Pipe, Pipeline, Sequencer, numba_pipe
+import pickle
+from error import UnwrapException
+from monad import Option, OptionBatch
 
-def test_seq():
-    class AddOnePipe(Pipe[int]):
-        def map(self, data):
-            return data.map(lambda x: x+1)
 
+class AddOnePipe(Pipe[int]):
+    def map(self, data):
+        return data.map(lambda x: x+1)
+
+    def map_batch(self, batch):
+        return OptionBatch(batch.values + 1, batch.mask)
+
+
+class EvenPipe(Pipe[int]):
+    def map(self, data):
+        return data.filter(lambda x: x % 2 == 0)
+
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None:
+    @numba_pipe
+    def double(x):
+        return x * 2
+
+    @numba_pipe
+    def inc(x):
+        return x + 1
+
+    @numba_pipe
+    def half(x):
+        return x / 2
+
+    @numba_pipe
+    def sq(x):
+        return x * x
+
+
+def test_seq():
     p0 = AddOnePipe()
     p1 = AddOnePipe()
     p2 = Sequencer([p0, p1])
@@ -14,4 +50,111 @@ def test_seq():
     assert res == Option.some(7)
     print(res)
 
-test_seq()
\ No newline at end of file
+    p3 = Sequencer([p0, EvenPipe(), p1])
+    assert p3(Option.some(5)) == Option.some(7)
+    assert p3(Option.some(4)) == Option.none()
+    assert Sequencer([])(Option.some(1)) == Option.some(1)
+    assert str(p3) == "Sequencer" and repr(p0) == "Pipe<AddOnePipe>"
+    assert pickle.loads(pickle.dumps(p3(Option.some(4)))) is Option.none()
+
+
+def test_unwrap():
+    try:
+        Option.none().unwrap()
+        assert False
+    except UnwrapException as e:
+        assert str(e) == 'OptionError: call `Option.unwrap` on an `Option<None>` object'
+    try:
+        Option.none().expect("100% sure")
+        assert False
+    except UnwrapException as e:
+        assert str(e) == 'OptionError: 100% sure'
+    e = pickle.loads(pickle.dumps(UnwrapException("sample %d is %s", 3, "empty")))
+    assert e.msg == "sample 3 is empty"
+
+
+def test_pipeline():
+    data = list(range(100))
+    pipeline = Pipeline([AddOnePipe(), EvenPipe()], num_proc=2)
+    assert pipeline.run(data) == [x + 1 for x in data if (x + 1) % 2 == 0]
+    assert Pipeline([AddOnePipe()], num_proc=1).run([1, 2]) == [2, 3]
+    stream = pipeline.stream(x for x in data)
+    assert next(stream) == 2 and next(stream) == 4
+
+
+def test_map_batch():
+    options = [Option.some(1), Option.none(), Option.some(4), Option.some(5)]
+    batch = OptionBatch.from_options(options)
+    res = Sequencer([AddOnePipe(), EvenPipe(), AddOnePipe()]).map_batch(batch)
+    assert res.to_options() == [Option.some(3), Option.none(), Option.none(), Option.some(7)]
+    assert np.array_equal(res.mask, [True, False, False, True])
+    empty = Sequencer([EvenPipe(), EvenPipe()]).map_batch(OptionBatch(np.arange(0)))
+    assert len(empty) == 0 and empty.values.dtype == np.arange(0).dtype
+
+    other = OptionBatch(np.array([0.5, 1.0, 2.0, 3.0]), np.array([True, True, True, False]))
+    assert (batch + other).to_options() == [
+        o + p for o, p in zip(options, other.to_options())
+    ]
+    assert (batch * other).to_options() == [Option.some(0.5), Option.none(), Option.some(8.0), Option.none()]
+
+
+def test_numba_pipe():
+    p = double()
+    assert p(Option.some(3)) == Option.some(6)
+    assert p(Option.none()) == Option.none()
+    batch = OptionBatch(np.arange(5), np.array([True, False, True, True, False]))
+    res = p.map_batch(batch)
+    assert res.values.dtype == np.int64
+    assert res.to_options() == [Option.some(0), Option.none(), Option.some(4), Option.some(6), Option.none()]
+    q = pickle.loads(pickle.dumps(p))
+    assert type(q) is double and repr(q) == "Pipe<double>"
+
+    batch = OptionBatch(np.arange(4), np.array([True, True, False, True]))
+    res = half().map_batch(batch)
+    assert res.values.dtype == np.float64
+    assert res.to_options() == [half()(o) for o in batch.to_options()]
+    assert res.to_options()[3] == Option.some(1.5)
+
+
+def test_numba_sequencer():
+    pipes = [double(), inc(), double()]
+    seq = Sequencer(pipes)
+    for values in (np.arange(6, dtype=np.int64), np.arange(6, dtype=np.float64) / 4):
+        batch = OptionBatch(values, np.array([True, False, True, True, False, True]))
+        expected = batch
+        for pipe in pipes:
+            expected = pipe.map_batch(expected)
+        res = seq.map_batch(batch)
+        assert res.values.dtype == values.dtype
+        assert res.to_options() == expected.to_options()
+    # the whole chain went through the fused ufunc.
+    assert seq._ufunc is not None
+
+    # a kernel changing the dtype must not keep intermediates in it until the end.
+    pipes = [half(), sq()]
+    batch = OptionBatch(np.arange(5))
+    expected = batch
+    for pipe in pipes:
+        expected = pipe.map_batch(expected)
+    res = Sequencer(pipes).map_batch(batch)
+    assert res.values.dtype == expected.values.dtype == np.float64
+    assert res.to_options() == expected.to_options()
+    assert res.to_options()[3] == Sequencer(pipes)(Option.some(3)) == Option.some(2.25)
+
+    # other dtypes take the per-pipe path, compiled for the actual dtype.
+    for values in (np.arange(4, dtype=np.int32), np.arange(4, dtype=np.uint64), np.arange(4) + 0.5j):
+        batch = OptionBatch(values, np.array([True, False, True, True]))
+        res = Sequencer([double()]).map_batch(batch)
+        expected = double().map_batch(batch)
+        assert res.values.dtype == expected.values.dtype
+        assert res.to_options() == expected.to_options()
+
+
+test_seq()
+test_unwrap()
+test_pipeline()
+test_map_batch()
+# numba's thread pool is started by `map_batch`, keep it after the forking tests.
+if numba is not None:
+    test_numba_pipe()
+    test_numba_sequencer()